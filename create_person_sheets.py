@@ -1,12 +1,18 @@
 import re
+from contextlib import closing
+from copy import copy
 from pathlib import Path
 
 import openpyxl
+from openpyxl.cell.cell import Cell
+from openpyxl.worksheet.worksheet import Worksheet
 
 # 人员信息文件与目标工作簿路径
 INFO_FILE = Path(r"D:\Test\2025年驾校考核人员信息汇总.xlsx")
 TARGET_FILE = Path(r"D:\Test\工作簿.xlsx")
 TEMPLATE_SHEET_NAME = "肖龙飞"
+# 预编译连续数字匹配，按数字段而非逐字符提取
+_DIGITS_RE = re.compile(r"\d+")
 
 
 def extract_digits(value: object) -> str:
@@ -14,32 +20,84 @@ def extract_digits(value: object) -> str:
     if value is None:
         return ""
     text = str(value).strip()
-    return "".join(re.findall(r"\d", text))
+    return "".join(_DIGITS_RE.findall(text))
+
+
+def snapshot_template_cells(template_ws: Worksheet) -> list[tuple]:
+    """一次性提取模板单元格的值、类型、样式、超链接与批注，供后续批量克隆复用。"""
+    return [
+        (
+            row,
+            column,
+            cell._value,
+            cell.data_type,
+            cell._style if cell.has_style else None,
+            cell.hyperlink,
+            cell.comment,
+        )
+        for (row, column), cell in template_ws._cells.items()
+    ]
+
+
+def clone_template_sheet(
+    workbook: openpyxl.Workbook,
+    template_ws: Worksheet,
+    template_cells: list[tuple],
+    title: str,
+) -> Worksheet:
+    """按模板快照创建新工作表，效果等同 copy_worksheet，但直接以目标名称建表并批量写入单元格。"""
+    # 直接使用最终名称建表，省去“模板名 Copy”的重名检测与二次改名
+    ws = workbook.create_sheet(title=title)
+
+    # 直接构造 Cell 写入 _cells，跳过 ws.cell() 的逐格校验；样式数组由 Cell 构造时复制
+    cells = ws._cells
+    for row, column, value, data_type, style, hyperlink, comment in template_cells:
+        cell = Cell(ws, row=row, column=column, style_array=style)
+        cell._value = value
+        cell.data_type = data_type
+        if hyperlink:
+            cell._hyperlink = copy(hyperlink)
+        if comment:
+            cell.comment = copy(comment)
+        cells[(row, column)] = cell
+
+    # 行高列宽等维度信息需绑定到新工作表
+    for attr in ("row_dimensions", "column_dimensions"):
+        target = getattr(ws, attr)
+        for key, dim in getattr(template_ws, attr).items():
+            target[key] = copy(dim)
+            target[key].worksheet = ws
+
+    ws.sheet_format = copy(template_ws.sheet_format)
+    ws.sheet_properties = copy(template_ws.sheet_properties)
+    ws.merged_cells = copy(template_ws.merged_cells)
+    ws.page_margins = copy(template_ws.page_margins)
+    ws.page_setup = copy(template_ws.page_setup)
+    ws.print_options = copy(template_ws.print_options)
+    return ws
 
 
 def main() -> None:
     """读取人员资料并基于模板生成或更新个人工作表。"""
-    # 读取人员信息工作簿
-    info_wb = openpyxl.load_workbook(INFO_FILE, data_only=True)
-    info_ws = info_wb["Sheet1"]
-
-    # 从第3行开始逐行读取姓名、士兵证号、身份证号
+    # 以只读模式流式读取人员信息工作簿，跳过样式解析以降低内存占用
     entries: list[tuple[str, str, str]] = []
-    for row in info_ws.iter_rows(min_row=3, min_col=3, max_col=5, values_only=True):
-        name, soldier_id, id_card = row
+    with closing(openpyxl.load_workbook(INFO_FILE, data_only=True, read_only=True)) as info_wb:
+        info_ws = info_wb["Sheet1"]
 
-        if not name:
-            continue
+        # 从第3行开始逐行读取姓名、士兵证号、身份证号
+        for row in info_ws.iter_rows(min_row=3, min_col=3, max_col=5, values_only=True):
+            name, soldier_id, id_card = row
 
-        name_str = str(name).strip()
-        if not name_str:
-            continue
+            if not name:
+                continue
 
-        soldier_digits = extract_digits(soldier_id)
-        id_card_str = str(id_card).strip() if id_card else ""
-        entries.append((name_str, soldier_digits, id_card_str))
+            name_str = str(name).strip()
+            if not name_str:
+                continue
 
-    info_wb.close()
+            soldier_digits = extract_digits(soldier_id)
+            id_card_str = str(id_card).strip() if id_card else ""
+            entries.append((name_str, soldier_digits, id_card_str))
 
     # 打开目标工作簿，基于模板复制新表并填写数据
     target_wb = openpyxl.load_workbook(TARGET_FILE)
@@ -47,21 +105,21 @@ def main() -> None:
         raise ValueError(f"模板工作表“{TEMPLATE_SHEET_NAME}”不存在")
 
     template_ws = target_wb[TEMPLATE_SHEET_NAME]
+    template_cells = snapshot_template_cells(template_ws)
     existing_names = set(target_wb.sheetnames)
 
     for name, soldier_id, id_card in entries:
-        # 如果工作表不存在则复制模板，否则直接覆盖B3/D3/B4
+        # 如果工作表不存在则克隆模板，否则直接覆盖B3/D3/B4
         if name not in existing_names:
-            ws = target_wb.copy_worksheet(template_ws)
-            ws.title = name
+            ws = clone_template_sheet(target_wb, template_ws, template_cells, name)
             existing_names.add(name)
         else:
             ws = target_wb[name]
 
-        # 写入对应字段，保持原有单元格格式
-        ws["B3"].value = name
-        ws["D3"].value = soldier_id
-        ws["B4"].value = id_card
+        # 写入对应字段（B3、D3、B4），按行列号定位以省去坐标字符串解析，保持原有单元格格式
+        ws.cell(row=3, column=2, value=name)
+        ws.cell(row=3, column=4, value=soldier_id)
+        ws.cell(row=4, column=2, value=id_card)
 
     target_wb.save(TARGET_FILE)
     target_wb.close()
@@ -1,7 +1,10 @@
 import argparse
+import bisect
+import itertools
 import math
-import re
+import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from pathlib import Path
 from typing import Dict, List, Tuple
@@ -11,7 +14,6 @@ from openpyxl.drawing.image import Image as XLImage
 from openpyxl.drawing.spreadsheet_drawing import AnchorMarker, OneCellAnchor
 from openpyxl.drawing.xdr import XDRPositiveSize2D
 from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
-from openpyxl.utils.units import pixels_to_EMU
 from PIL import Image as PILImage
 
 # 目标单元格
@@ -19,9 +21,20 @@ TARGET_CELL = "B19"
 # 合并区域的列与行范围，决定图片的目标尺寸
 TARGET_COLUMNS = ("B", "C", "D", "E")
 TARGET_ROWS = (19, 20, 21)
+# 目标单元格的 0 基（列, 行）索引，模块加载时解析一次
+_TARGET_COLUMN_LETTER, _TARGET_ROW_NUMBER = coordinate_from_string(TARGET_CELL)
+_TARGET_ANCHOR = (column_index_from_string(_TARGET_COLUMN_LETTER) - 1, _TARGET_ROW_NUMBER - 1)
 # Excel 的默认列宽与行高
 DEFAULT_COLUMN_WIDTH = 8.38
 DEFAULT_ROW_HEIGHT = 15.0
+# 每像素对应的 EMU 数（96 DPI 下 914400 / 96），与 openpyxl 的换算一致
+EMU_PER_PIXEL = 9525
+# 支持的图片扩展名（小写）
+IMAGE_SUFFIXES = frozenset({".jpg", ".jpeg", ".png", ".bmp"})
+# 尺寸匹配时可直接嵌入原始文件字节的图片格式
+PASSTHROUGH_FORMATS = frozenset({"JPEG", "PNG", "BMP"})
+# Image.reduce 支持的图片模式；16/32 位整数灰度（I;16、I 等）不支持，缩放时不能传 reducing_gap
+REDUCIBLE_MODES = frozenset({"L", "LA", "RGB", "RGBA", "CMYK"})
 
 
 def column_width_to_pixels(width: float | None) -> float:
@@ -42,51 +55,32 @@ def row_height_to_pixels(height: float | None) -> float:
     return float(height * 4 / 3)
 
 
-def merged_columns_width_in_pixels(
-    ws: openpyxl.worksheet.worksheet.Worksheet,
-    columns: Tuple[str, ...],
-) -> int:
-    """统计合并区域内各列宽度的像素总和，作为图片宽度参考。"""
-    total_width = 0.0
-    for letter in columns:
-        col_dim = ws.column_dimensions.get(letter)
-        width = column_width_to_pixels(col_dim.width if col_dim and col_dim.width is not None else None)
-        total_width += width
-    return int(total_width)
-
-
-def merged_rows_height_in_pixels(
-    ws: openpyxl.worksheet.worksheet.Worksheet,
-    rows: Tuple[int, ...],
-) -> int:
-    """统计合并区域内各行高度的像素总和，确保图片高度匹配。"""
-    total_height = 0.0
-    for index in rows:
-        row_dim = ws.row_dimensions.get(index)
-        height = row_height_to_pixels(row_dim.height if row_dim and row_dim.height is not None else None)
-        total_height += height
-    return int(total_height)
-
-
 def load_images_by_person(images_dir: Path) -> Dict[str, List[Tuple[int, Path]]]:
     """按姓名归集人员图片，并按照文件名中末尾的数字序号排序。"""
     image_map: Dict[str, List[Tuple[int, Path]]] = defaultdict(list)
-    pattern = re.compile(r"^(?P<name>.+?)(?P<index>\d+)?$", re.UNICODE)
 
-    for path in images_dir.iterdir():
-        if not path.is_file():
-            continue
-        if path.suffix.lower() not in {".jpg", ".jpeg", ".png", ".bmp"}:
-            continue
-        match = pattern.match(path.stem)
-        if not match:
-            continue
-        name = match.group("name").strip()
-        if not name:
-            continue
-        index_str = match.group("index")
-        order = int(index_str) if index_str and index_str.isdigit() else 0
-        image_map[name].append((order, path))
+    # os.scandir 在读取目录时已缓存文件类型，普通文件无需逐个 stat；
+    # 仅对通过过滤的条目构造 Path 对象
+    with os.scandir(images_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            file_name = entry.name
+            dot = file_name.rfind(".")
+            if dot <= 0 or file_name[dot:].lower() not in IMAGE_SUFFIXES:
+                continue
+            # 文件名拆分为“姓名 + 末尾序号”，从末尾向前剥离数字，无需正则回溯；
+            # 使用 isdecimal 以兼容全角数字（如“张三１.jpg”），与 \d 及 int() 的范围一致
+            stem = file_name[:dot]
+            split = len(stem)
+            while split and stem[split - 1].isdecimal():
+                split -= 1
+            name = stem[:split].strip()
+            if not name:
+                continue
+            index_str = stem[split:]
+            order = int(index_str) if index_str else 0
+            image_map[name].append((order, Path(entry.path)))
 
     for name in image_map:
         image_map[name].sort(key=lambda item: item[0])
@@ -96,47 +90,65 @@ def load_images_by_person(images_dir: Path) -> Dict[str, List[Tuple[int, Path]]]
 def resize_image(image_path: Path, width: int, height: int) -> PILImage.Image:
     """使用 Pillow 调整图片尺寸，保持简单缩放。"""
     with PILImage.open(image_path) as image:
-        resized = image.resize((width, height))
+        # 原图已是目标尺寸时无需重采样
+        if image.size == (width, height):
+            return image.copy()
+        # JPEG 在解码阶段直接按 1/2、1/4、1/8 缩小（DCT 缩放），避免全分辨率解码
+        if image.format == "JPEG":
+            image.draft(image.mode, (width * 2, height * 2))
+        # reducing_gap 先按整数倍逐轴缩小（每轴均不低于目标的两倍），再做 LANCZOS 精确缩放；
+        # 不使用 thumbnail，因为它保持宽高比，会让某一轴小于目标而被迫放大。
+        # 16 位扫描件等 reduce 不支持的模式直接做 LANCZOS 缩放
+        reducing_gap = 2.0 if image.mode in REDUCIBLE_MODES else None
+        resized = image.resize((width, height), PILImage.LANCZOS, reducing_gap=reducing_gap)
     return resized
 
 
-def image_to_stream(image: PILImage.Image, fmt: str) -> BytesIO:
-    """将 PIL Image 转换为内存流，便于 openpyxl 消耗。"""
+def prepare_image_bytes(path: Path, width: int, height: int) -> tuple[bytes | None, str]:
+    """缩放并编码单张图片，返回编码后的字节与格式；作为进程池任务运行，不依赖 openpyxl 对象。
+
+    源文件可原样嵌入时返回 None 代替字节，由主进程直接按路径交给 openpyxl。
+    """
+    fmt = (path.suffix or ".png").replace(".", "").upper()
+    if fmt == "JPG":
+        fmt = "JPEG"
+    # 源文件格式与扩展名一致且已是目标尺寸时无需解码与重新编码；只读取文件头判断尺寸
+    if fmt in PASSTHROUGH_FORMATS:
+        with PILImage.open(path) as image:
+            if image.format == fmt and image.size == (width, height):
+                return None, fmt
+
+    resized = resize_image(path, width, height)
+    # 直接编码到内存缓冲区；JPEG 关闭 optimize 的额外熵编码优化并固定质量
+    save_kwargs = {"optimize": False, "quality": 85} if fmt == "JPEG" else {}
     stream = BytesIO()
-    image.save(stream, format=fmt)
-    stream.seek(0)
-    return stream
+    resized.save(stream, format=fmt, **save_kwargs)
+    resized.close()
+    return stream.getvalue(), fmt
 
 
-def insert_images_to_sheet(
+def compute_sheet_layout(
     ws: openpyxl.worksheet.worksheet.Worksheet,
-    image_paths: List[Path],
-    cell_address: str,
     columns: Tuple[str, ...],
     rows: Tuple[int, ...],
-) -> None:
-    """将图片插入模板的合并单元格中，并横向平铺整个区域。"""
-    if not image_paths:
-        return
+    image_count: int,
+) -> Tuple[List[int], List[int], int] | None:
+    """计算合并区域的各列像素宽度、每张图片的宽度分配与统一高度；区域无效时返回 None。"""
+    max_images = min(image_count, 2)
+    if max_images == 0:
+        return None
 
-    column_letter, row_number = coordinate_from_string(cell_address)
-    column_letter = column_letter.upper()
-    col_idx = column_index_from_string(column_letter) - 1
-    row_idx = row_number - 1
+    # 每张工作表只读取一次列宽与行高，后续宽度分配与锚点计算均复用该结果
+    # getattr 同时处理“维度不存在”与“未设置宽高”两种情况，缺省值交由换算函数处理
+    col_dims = ws.column_dimensions
+    column_widths_px = [int(column_width_to_pixels(getattr(col_dims.get(letter), "width", None))) for letter in columns]
+    row_dims = ws.row_dimensions
+    row_heights_px = [row_height_to_pixels(getattr(row_dims.get(index), "height", None)) for index in rows]
 
-    total_width_px = merged_columns_width_in_pixels(ws, columns)
-    total_height_px = merged_rows_height_in_pixels(ws, rows)
+    total_width_px = sum(column_widths_px)
+    total_height_px = int(sum(row_heights_px))
     if total_width_px <= 0 or total_height_px <= 0:
-        return
-
-    column_widths_px: List[int] = []
-    for letter in columns:
-        col_dim = ws.column_dimensions.get(letter)
-        column_widths_px.append(int(column_width_to_pixels(col_dim.width if col_dim and col_dim.width is not None else None)))
-
-    max_images = min(len(image_paths), 2)
-    if max_images == 0:
-        return
+        return None
 
     base_width = total_width_px / max_images
     width_allocations: List[int] = []
@@ -148,22 +160,41 @@ def insert_images_to_sheet(
         width_allocations.append(max(right - previous_right, 1))
         previous_right = right
 
-    offset_px = 0
     print(f"\n[调试] 合并区域总宽度: {total_width_px}px, 总高度: {total_height_px}px")
     print(f"[调试] 各列宽度(像素): {column_widths_px}")
     print(f"[调试] 将插入 {max_images} 张图片, 宽度分配: {width_allocations}")
+    return column_widths_px, width_allocations, total_height_px
 
-    for idx, path in enumerate(image_paths[:max_images]):
+
+def insert_images_to_sheet(
+    ws: openpyxl.worksheet.worksheet.Worksheet,
+    images: List[Tuple[Path, bytes | None]],
+    cell_address: str,
+    column_widths_px: List[int],
+    width_allocations: List[int],
+    total_height_px: int,
+) -> None:
+    """将已编码的图片插入模板的合并单元格中，并横向平铺整个区域。"""
+    if not images:
+        return
+
+    if cell_address == TARGET_CELL:
+        col_idx, row_idx = _TARGET_ANCHOR
+    else:
+        column_letter, row_number = coordinate_from_string(cell_address)
+        col_idx = column_index_from_string(column_letter.upper()) - 1
+        row_idx = row_number - 1
+
+    # 各列右边界的累计像素位置（前缀和），每张工作表只计算一次
+    column_right_edges = list(itertools.accumulate(column_widths_px))
+
+    offset_px = 0
+    for idx, (path, data) in enumerate(images):
         print(f"\n--- 处理第 {idx+1} 张图片: {path.name} ---")
         image_width_px = width_allocations[idx]
-        resized = resize_image(path, image_width_px, total_height_px)
-        fmt = (path.suffix or ".png").replace(".", "").upper()
-        if fmt == "JPG":
-            fmt = "JPEG"
-        stream = image_to_stream(resized, fmt)
-        resized.close()
-
-        img = XLImage(stream)
+
+        # 无需缩放的图片直接引用源文件，保存时由 openpyxl 读取原始字节
+        img = XLImage(str(path)) if data is None else XLImage(BytesIO(data))
         img.width = image_width_px
         img.height = total_height_px
 
@@ -172,24 +203,15 @@ def insert_images_to_sheet(
         # ===== 步骤1：计算当前图片在合并区域内的列偏移位置 =====
         # 目标：根据已放置图片的累计宽度（offset_px），确定当前图片应该从哪一列开始放置
 
-        # remaining_offset: 剩余的像素偏移量，初始值为已放置图片的总宽度
-        remaining_offset = offset_px
-        # col_offset: 相对于起始列（col_idx）的列偏移量，初始为0表示从起始列开始
-        col_offset = 0
-
         print(f"[调试] 起始累计偏移量: {offset_px}px")
 
-        # 逐列遍历合并区域的列宽，找到能容纳当前偏移量的目标列
-        # 例如：如果 offset_px=150px，列宽依次为 [80, 80, 80, 80]
-        #       第1列：150 >= 80，remaining_offset -= 80 → 70，col_offset=1
-        #       第2列：70 < 80，停止循环，图片将从第2列（偏移70px处）开始
-        for width_px in column_widths_px:
-            if remaining_offset < width_px:
-                # 当前列能够容纳剩余偏移量，找到了目标列
-                break
-            # 当前列宽度不足以容纳偏移量，继续向右查找下一列
-            remaining_offset -= width_px
-            col_offset += 1
+        # 在列宽前缀和上二分查找第一个右边界大于偏移量的列，即图片起始列
+        # 例如：如果 offset_px=150px，列宽依次为 [80, 80, 80, 80]，前缀和为 [80, 160, 240, 320]
+        #       bisect_right 返回 1（150 < 160），图片将从第2列开始，列内偏移 150 - 80 = 70px
+        # col_offset: 相对于起始列（col_idx）的列偏移量
+        col_offset = bisect.bisect_right(column_right_edges, offset_px)
+        # remaining_offset: 目标列内的剩余像素偏移量
+        remaining_offset = offset_px - (column_right_edges[col_offset - 1] if col_offset else 0)
 
         print(f"[调试] 列偏移计算: col_offset={col_offset}, remaining_offset={remaining_offset}px")
 
@@ -205,7 +227,7 @@ def insert_images_to_sheet(
         # ===== 步骤3：设置图片锚点（定位信息） =====
         # OneCellAnchor: 使用单元格锚点模式，图片左上角固定在指定单元格位置
         anchor_col = col_idx + col_offset
-        anchor_col_off_emu = pixels_to_EMU(remaining_offset)
+        anchor_col_off_emu = int(remaining_offset * EMU_PER_PIXEL)
 
         print(f"[调试] 锚点参数: 列索引={anchor_col} (基准{col_idx}+偏移{col_offset}), 列内偏移={remaining_offset}px ({anchor_col_off_emu} EMU)")
         print(f"[调试] 锚点参数: 行索引={row_idx}, 行内偏移=0px")
@@ -227,9 +249,9 @@ def insert_images_to_sheet(
             # ext: 定义图片的实际尺寸（宽度和高度）
             ext=XDRPositiveSize2D(
                 # 图片宽度（像素转 EMU），由前面的宽度分配算法确定
-                pixels_to_EMU(image_width_px),
+                int(image_width_px * EMU_PER_PIXEL),
                 # 图片高度（像素转 EMU），等于合并区域的总高度
-                pixels_to_EMU(total_height_px),
+                int(total_height_px * EMU_PER_PIXEL),
             ),
         )
 
@@ -247,14 +269,40 @@ def process_workbook(workbook_path: Path, images_dir: Path) -> None:
     image_map = load_images_by_person(images_dir)
     wb = openpyxl.load_workbook(workbook_path)
 
+    # 第一遍：按工作表计算布局，并把所有图片的缩放编码任务展平
+    sheet_plans: List[Tuple[str, List[Path], Tuple[List[int], List[int], int]]] = []
+    tasks: List[Tuple[str, int, Path, int, int]] = []
     for name, ordered_paths in image_map.items():
         if name not in wb.sheetnames:
             continue
         if len(ordered_paths) < 2:
             continue
-        ws = wb[name]
         first_two = [path for _, path in ordered_paths[:2]]
-        insert_images_to_sheet(ws, first_two, TARGET_CELL, TARGET_COLUMNS, TARGET_ROWS)
+        layout = compute_sheet_layout(wb[name], TARGET_COLUMNS, TARGET_ROWS, len(first_two))
+        if layout is None:
+            continue
+        _, width_allocations, total_height_px = layout
+        sheet_plans.append((name, first_two, layout))
+        for idx, path in enumerate(first_two):
+            tasks.append((name, idx, path, width_allocations[idx], total_height_px))
+
+    # 第二遍：Pillow 缩放与编码是 CPU 密集步骤，按人员并行到多进程中执行
+    encoded: Dict[Tuple[str, int], bytes | None] = {}
+    if tasks:
+        with ProcessPoolExecutor() as executor:
+            results = executor.map(
+                prepare_image_bytes,
+                [task[2] for task in tasks],
+                [task[3] for task in tasks],
+                [task[4] for task in tasks],
+            )
+            for (name, idx, _, _, _), (data, _) in zip(tasks, results):
+                encoded[(name, idx)] = data
+
+    # 第三遍：在主进程中顺序挂载预编码的图片，openpyxl 对象不跨进程传递
+    for name, first_two, (column_widths_px, width_allocations, total_height_px) in sheet_plans:
+        images = [(path, encoded[(name, idx)]) for idx, path in enumerate(first_two)]
+        insert_images_to_sheet(wb[name], images, TARGET_CELL, column_widths_px, width_allocations, total_height_px)
 
     wb.save(workbook_path)
     wb.close()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 脚本位于仓库根目录，测试时将其加入导入路径
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
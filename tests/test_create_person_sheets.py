@@ -0,0 +1,84 @@
+import zipfile
+from pathlib import Path
+
+import openpyxl
+from openpyxl.comments import Comment
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+import create_person_sheets as cps
+
+
+def build_template_workbook() -> openpyxl.Workbook:
+    """构造带样式、合并区域、行高列宽、超链接与批注的模板工作簿。"""
+    wb = openpyxl.Workbook()
+    template = wb.active
+    template.title = cps.TEMPLATE_SHEET_NAME
+    for row in range(1, 25):
+        for column in range(1, 7):
+            cell = template.cell(row, column, value=f"v{row}{column}" if (row + column) % 3 else row * column)
+            if row % 2:
+                cell.font = Font(bold=True, color="FF0000")
+                cell.border = Border(left=Side(style="thin"))
+            if column == 3:
+                cell.fill = PatternFill("solid", fgColor="FFFF00")
+                cell.number_format = "0.00"
+            if column == 5:
+                cell.alignment = Alignment(horizontal="center", wrap_text=True)
+    template.merge_cells("B19:E21")
+    template.column_dimensions["B"].width = 12
+    template.column_dimensions["F"].font = Font(italic=True)
+    template.row_dimensions[20].height = 30
+    template.row_dimensions[30].height = 40
+    template["A1"].hyperlink = "http://example.com"
+    template["A2"].comment = Comment("备注", "tester")
+    template.page_setup.orientation = "landscape"
+    return wb
+
+
+def package_parts(path: Path) -> dict[str, bytes]:
+    """读取 xlsx 中除文档属性（含保存时间戳）外的全部部件。"""
+    with zipfile.ZipFile(path) as archive:
+        return {name: archive.read(name) for name in archive.namelist() if not name.startswith("docProps/")}
+
+
+def test_clone_template_sheet_matches_copy_worksheet(tmp_path):
+    # 两个独立工作簿分别用 copy_worksheet 与 clone_template_sheet 生成人员表；
+    # 复制合并区域时 openpyxl 会回写模板左上角单元格的边框，因此不能在同一工作簿中混用两种方式对比
+    copied_wb = build_template_workbook()
+    template = copied_wb[cps.TEMPLATE_SHEET_NAME]
+    for title in ("张三", "李四"):
+        copy_ws = copied_wb.copy_worksheet(template)
+        copy_ws.title = title
+
+    cloned_wb = build_template_workbook()
+    template = cloned_wb[cps.TEMPLATE_SHEET_NAME]
+    template_cells = cps.snapshot_template_cells(template)
+    for title in ("张三", "李四"):
+        cps.clone_template_sheet(cloned_wb, template, template_cells, title)
+
+    for title in ("张三", "李四"):
+        copy_ws, clone_ws = copied_wb[title], cloned_wb[title]
+        assert clone_ws.merged_cells.ranges == copy_ws.merged_cells.ranges
+        assert clone_ws.column_dimensions["B"].width == copy_ws.column_dimensions["B"].width
+        assert clone_ws.row_dimensions[20].height == copy_ws.row_dimensions[20].height
+        assert clone_ws["A1"].hyperlink.target == copy_ws["A1"].hyperlink.target
+        assert clone_ws["A2"].comment.text == copy_ws["A2"].comment.text
+
+    # 保存后的工作表 XML（单元格、样式索引、维度、合并区域、页面设置）与样式表应逐字节一致
+    copied_path, cloned_path = tmp_path / "copied.xlsx", tmp_path / "cloned.xlsx"
+    copied_wb.save(copied_path)
+    cloned_wb.save(cloned_path)
+    assert package_parts(cloned_path) == package_parts(copied_path)
+
+
+def test_clone_template_sheet_does_not_share_styles(tmp_path):
+    wb = build_template_workbook()
+    template = wb[cps.TEMPLATE_SHEET_NAME]
+    cloned = cps.clone_template_sheet(wb, template, cps.snapshot_template_cells(template), "cloned")
+
+    cloned["A1"].font = Font(italic=True)
+    cloned["A2"].comment = Comment("改动", "tester")
+
+    assert template["A1"].font.i is False
+    assert template["A1"].font.b is True
+    assert template["A2"].comment.text == "备注"
@@ -0,0 +1,178 @@
+from io import BytesIO
+from pathlib import Path
+
+import openpyxl
+import pytest
+from PIL import Image as PILImage
+
+import insert_images as ii
+
+# B~E 列宽（字符）：75px、145px、默认 63px、40px，合计 323px；第20行 30 磅（40px），其余默认 20px
+CUSTOM_WIDTHS = {"B": 10, "C": 20, "E": 5}
+COLUMN_WIDTHS_PX = [75, 145, 63, 40]
+TOTAL_HEIGHT_PX = 80
+
+
+def build_person_sheet(wb: openpyxl.Workbook, title: str):
+    """按模板的合并区域设置创建人员表：B19:E21 合并，部分列宽与行高为自定义值。"""
+    ws = wb.create_sheet(title)
+    for letter, width in CUSTOM_WIDTHS.items():
+        ws.column_dimensions[letter].width = width
+    ws.row_dimensions[20].height = 30
+    ws.merge_cells("B19:E21")
+    return ws
+
+
+def save_image(path: Path, size: tuple[int, int], mode: str = "RGB") -> Path:
+    PILImage.new(mode, size).save(path)
+    return path
+
+
+def anchor_of(image) -> tuple[int, int, int, int, int]:
+    marker = image.anchor._from
+    return marker.col, marker.colOff, marker.row, image.anchor.ext.width, image.anchor.ext.height
+
+
+@pytest.mark.parametrize("mode", ["I;16", "I;16B", "L", "RGB", "RGBA"])
+def test_prepare_image_bytes_resizes_every_mode(tmp_path, mode):
+    # 16 位灰度 PNG（如扫描件）不支持 Image.reduce，缩放时不能因 reducing_gap 报错
+    path = save_image(tmp_path / "张三1.png", (400, 300), mode)
+
+    data, fmt = ii.prepare_image_bytes(path, 40, 30)
+
+    assert fmt == "PNG"
+    with PILImage.open(BytesIO(data)) as image:
+        assert image.size == (40, 30)
+
+
+def test_prepare_image_bytes_passes_through_matching_size(tmp_path):
+    path = save_image(tmp_path / "张三1.jpg", (40, 30))
+    assert ii.prepare_image_bytes(path, 40, 30) == (None, "JPEG")
+
+    # 扩展名与实际格式不符时仍需重新编码
+    mislabeled = save_image(tmp_path / "张三2.bmp", (40, 30))
+    mislabeled.rename(tmp_path / "张三2.png")
+    data, fmt = ii.prepare_image_bytes(tmp_path / "张三2.png", 40, 30)
+    assert fmt == "PNG"
+    with PILImage.open(BytesIO(data)) as image:
+        assert (image.format, image.size) == ("PNG", (40, 30))
+
+
+def test_compute_sheet_layout_uses_custom_dimensions():
+    ws = build_person_sheet(openpyxl.Workbook(), "张三")
+
+    assert ii.compute_sheet_layout(ws, ii.TARGET_COLUMNS, ii.TARGET_ROWS, 2) == (COLUMN_WIDTHS_PX, [162, 161], TOTAL_HEIGHT_PX)
+    # 只有一张图片时占满整个区域；超过两张时只分配前两张
+    assert ii.compute_sheet_layout(ws, ii.TARGET_COLUMNS, ii.TARGET_ROWS, 1)[1] == [323]
+    assert ii.compute_sheet_layout(ws, ii.TARGET_COLUMNS, ii.TARGET_ROWS, 5)[1] == [162, 161]
+    assert ii.compute_sheet_layout(ws, ii.TARGET_COLUMNS, ii.TARGET_ROWS, 0) is None
+
+
+def test_insert_images_to_sheet_anchors(tmp_path):
+    ws = build_person_sheet(openpyxl.Workbook(), "张三")
+    path = save_image(tmp_path / "张三1.png", (162, 80))
+    stream = BytesIO()
+    PILImage.new("RGB", (161, 80)).save(stream, format="PNG")
+
+    ii.insert_images_to_sheet(
+        ws, [(path, None), (path, stream.getvalue())], ii.TARGET_CELL, COLUMN_WIDTHS_PX, [162, 161], TOTAL_HEIGHT_PX
+    )
+
+    # 第一张从 B19 左上角开始；第二张偏移 162px，落在 C 列（右边界 75 之后）列内 87px 处
+    assert [anchor_of(image) for image in ws._images] == [
+        (1, 0, 18, 162 * ii.EMU_PER_PIXEL, 80 * ii.EMU_PER_PIXEL),
+        (2, 87 * ii.EMU_PER_PIXEL, 18, 161 * ii.EMU_PER_PIXEL, 80 * ii.EMU_PER_PIXEL),
+    ]
+
+
+def test_process_workbook_round_trip(tmp_path):
+    workbook_path = tmp_path / "工作簿.xlsx"
+    wb = openpyxl.Workbook()
+    build_person_sheet(wb, "张三")
+    build_person_sheet(wb, "李四")
+    wb.save(workbook_path)
+
+    images_dir = tmp_path / "images"
+    images_dir.mkdir()
+    save_image(images_dir / "张三1.jpg", (1200, 900))
+    # 16 位灰度扫描件；第三张图片不插入
+    save_image(images_dir / "张三2.png", (800, 600), "I;16")
+    save_image(images_dir / "张三3.png", (50, 50))
+    # 仅一张图片的人员与不存在工作表的人员均跳过
+    save_image(images_dir / "李四1.jpg", (300, 200))
+    save_image(images_dir / "王五1.jpg", (300, 200))
+    save_image(images_dir / "王五2.jpg", (300, 200))
+
+    ii.process_workbook(workbook_path, images_dir)
+
+    result = openpyxl.load_workbook(workbook_path)
+    assert result["李四"]._images == []
+    images = result["张三"]._images
+    assert [anchor_of(image)[:3] for image in images] == [(1, 0, 18), (2, 87 * ii.EMU_PER_PIXEL, 18)]
+    sizes = []
+    for image in images:
+        with PILImage.open(BytesIO(image._data())) as embedded:
+            sizes.append((embedded.format, embedded.size))
+    assert sizes == [("JPEG", (162, 80)), ("PNG", (161, 80))]
+
+
+def test_load_images_by_person_parses_names(tmp_path):
+    for file_name in (
+        "张三１０.jpg",  # 全角序号
+        "张三２.JPG",
+        "张三.png",  # 无序号按 0 排序
+        "李四.备份3.jpeg",  # 多个点号时仅最后一个为扩展名
+        "123.jpg",  # 纯数字文件名无姓名，跳过
+        ".jpg",  # 点文件没有扩展名，跳过
+        "王五1.gif",  # 不支持的扩展名
+    ):
+        (tmp_path / file_name).write_bytes(b"")
+    (tmp_path / "赵六1.jpg").mkdir()
+
+    image_map = ii.load_images_by_person(tmp_path)
+
+    assert {name: [(order, path.name) for order, path in items] for name, items in image_map.items()} == {
+        "张三": [(0, "张三.png"), (2, "张三２.JPG"), (10, "张三１０.jpg")],
+        "李四.备份": [(3, "李四.备份3.jpeg")],
+    }
+
+
+def loop_anchor(column_widths_px: list[int], offset_px: int) -> tuple[int, int]:
+    """二分查找前的逐列相减算法（含越界修正），作为锚点列计算的参照。"""
+    remaining_offset = offset_px
+    col_offset = 0
+    for width_px in column_widths_px:
+        if remaining_offset < width_px:
+            break
+        remaining_offset -= width_px
+        col_offset += 1
+    if col_offset >= len(column_widths_px):
+        col_offset = len(column_widths_px) - 1
+        remaining_offset = max(column_widths_px[-1] - 1, 0)
+    return col_offset, remaining_offset
+
+
+@pytest.mark.parametrize(
+    ("column_widths_px", "offset_px"),
+    [
+        ([80, 80, 80, 80], 0),
+        ([80, 80, 80, 80], 80),  # 恰在列边界上
+        ([80, 80, 80, 80], 150),  # 列内
+        ([80, 80, 80, 80], 320),  # 恰在区域右边界，越界修正到最后一列
+        ([80, 80, 80, 80], 400),  # 超出区域
+        ([80, 0, 80, 80], 80),  # 零宽列
+        ([0, 80, 80, 80], 0),
+        ([80, 80, 80, 0], 160),
+        ([80, 80, 80, 0], 240),
+    ],
+)
+def test_anchor_column_matches_subtraction_loop(tmp_path, column_widths_px, offset_px):
+    # 第一张图片的宽度即第二张图片的起始偏移
+    ws = openpyxl.Workbook().active
+    path = save_image(tmp_path / "张三1.png", (10, 10))
+
+    ii.insert_images_to_sheet(ws, [(path, None), (path, None)], ii.TARGET_CELL, column_widths_px, [offset_px, 10], 10)
+
+    col, col_off, _, _, _ = anchor_of(ws._images[1])
+    col_offset, remaining_offset = loop_anchor(column_widths_px, offset_px)
+    assert (col, col_off) == (1 + col_offset, remaining_offset * ii.EMU_PER_PIXEL)